@@ -1,214 +1,418 @@
 import sqlite3
-import json
 import os
-from datetime import datetime, timezone
-from typing import Optional, List, Dict
-import random
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Tuple
+
+# Hot-path statements. sqlite3 caches prepared statements per connection keyed by SQL
+# text, so keeping each query as a single constant means it is parsed once per connection.
+JOB_FIELDS = ("id", "status", "created_at", "updated_at", "start_time", "worker_url", "starred", "elapsed_time")
+# elapsed_time (seconds) is computed by SQLite for working jobs, so callers never post-process rows
+ELAPSED_TIME_COLUMN = (
+    "CASE WHEN status = 'working' AND start_time IS NOT NULL "
+    "THEN CAST(strftime('%s', 'now') AS INTEGER) - start_time END AS elapsed_time"
+)
+JOB_COLUMNS = ", ".join(JOB_FIELDS[:-1] + (ELAPSED_TIME_COLUMN,))
+SELECT_NEXT_INACTIVE_SQL = "SELECT id FROM jobs WHERE status = 'inactive' ORDER BY id LIMIT 1"
+SELECT_JOB_SQL = f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?"
+SELECT_JOBS_SQL = f"SELECT {JOB_COLUMNS} FROM jobs ORDER BY id LIMIT ? OFFSET ?"
+SELECT_JOBS_BY_STATUS_SQL = f"SELECT {JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY id LIMIT ? OFFSET ?"
+# Keyset pagination: seek straight to the cursor instead of walking and discarding OFFSET rows
+SELECT_JOBS_AFTER_SQL = f"SELECT {JOB_COLUMNS} FROM jobs WHERE id > ? ORDER BY id LIMIT ?"
+SELECT_JOBS_BY_STATUS_AFTER_SQL = f"SELECT {JOB_COLUMNS} FROM jobs WHERE status = ? AND id > ? ORDER BY id LIMIT ?"
+# Same pages rendered straight to a JSON array by SQLite (plus the page's last id for the cursor);
+# CAST AS BLOB hands the UTF-8 bytes over as-is instead of decoding them to str
+JOB_JSON_OBJECT = (
+    "json_object('id', id, 'status', status, 'created_at', created_at, 'updated_at', updated_at, "
+    "'start_time', start_time, 'worker_url', worker_url, "
+    "'starred', json(CASE WHEN starred THEN 'true' ELSE 'false' END), 'elapsed_time', elapsed_time)"
+)
+JOBS_JSON_SQL = f"SELECT CAST(json_group_array({JOB_JSON_OBJECT}) AS BLOB), max(id) FROM ({{}})"
+SELECT_JOBS_JSON_SQL = JOBS_JSON_SQL.format(SELECT_JOBS_SQL)
+SELECT_JOBS_BY_STATUS_JSON_SQL = JOBS_JSON_SQL.format(SELECT_JOBS_BY_STATUS_SQL)
+SELECT_JOBS_AFTER_JSON_SQL = JOBS_JSON_SQL.format(SELECT_JOBS_AFTER_SQL)
+SELECT_JOBS_BY_STATUS_AFTER_JSON_SQL = JOBS_JSON_SQL.format(SELECT_JOBS_BY_STATUS_AFTER_SQL)
+# Page queries keyed by filter shape (status filter?, keyset cursor?) -> (rows SQL, JSON SQL)
+JOBS_PAGE_SQL = {
+    (False, False): (SELECT_JOBS_SQL, SELECT_JOBS_JSON_SQL),
+    (True, False): (SELECT_JOBS_BY_STATUS_SQL, SELECT_JOBS_BY_STATUS_JSON_SQL),
+    (False, True): (SELECT_JOBS_AFTER_SQL, SELECT_JOBS_AFTER_JSON_SQL),
+    (True, True): (SELECT_JOBS_BY_STATUS_AFTER_SQL, SELECT_JOBS_BY_STATUS_AFTER_JSON_SQL),
+}
+START_JOB_SQL = "UPDATE jobs SET status = 'working', updated_at = ?, start_time = ?, worker_url = ? WHERE id = ?"
+CLAIM_JOB_SQL = START_JOB_SQL + " AND status = 'inactive'"
+# Single-statement claim of the next inactive job (RETURNING needs SQLite 3.35+)
+NEXT_JOB_SQL = (
+    "UPDATE jobs SET status = 'working', updated_at = ?, start_time = ?, worker_url = ? "
+    "WHERE id = (SELECT id FROM jobs WHERE status = 'inactive' ORDER BY id LIMIT 1) "
+    f"RETURNING {JOB_COLUMNS}"
+)
+# Batch claim for workers that prefetch several jobs per round trip
+SELECT_NEXT_INACTIVE_IDS_SQL = "SELECT id FROM jobs WHERE status = 'inactive' ORDER BY id LIMIT ?"
+NEXT_JOBS_SQL = (
+    "UPDATE jobs SET status = 'working', updated_at = ?, start_time = ?, worker_url = ? "
+    f"WHERE id IN ({SELECT_NEXT_INACTIVE_IDS_SQL}) RETURNING id"
+)
+RESET_JOBS_SQL = "UPDATE jobs SET status = 'inactive', updated_at = ?, start_time = NULL, worker_url = NULL WHERE "
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+# Moving to 'working' keeps start_time/worker_url; any other status clears them
+UPDATE_STATUS_SQL = (
+    "UPDATE jobs SET status = ?1, updated_at = ?2, "
+    "start_time = CASE WHEN ?1 = 'working' THEN start_time END, "
+    "worker_url = CASE WHEN ?1 = 'working' THEN worker_url END "
+    "WHERE id = ?3"
+)
+STATS_SQL = "SELECT status, count FROM job_stats WHERE count > 0"
+
+# Per-status counts kept up to date by triggers, so /stats never has to scan the jobs table
+JOB_STATS_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS job_stats (status TEXT PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_stats_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO job_stats (status, count) VALUES (NEW.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_stats_ad AFTER DELETE ON jobs BEGIN
+        UPDATE job_stats SET count = count - 1 WHERE status = OLD.status;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_stats_au AFTER UPDATE OF status ON jobs
+    WHEN OLD.status IS NOT NEW.status BEGIN
+        UPDATE job_stats SET count = count - 1 WHERE status = OLD.status;
+        INSERT INTO job_stats (status, count) VALUES (NEW.status, 1)
+            ON CONFLICT(status) DO UPDATE SET count = count + 1;
+    END
+    """,
+]
+# Coalesces burst polling of /stats; any write through this instance invalidates it
+STATS_CACHE_TTL = 0.5
 
 class JobDatabase:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, pool_size: int = None):
         if db_path is None:
             # Use environment variable for Railway or default to local
             db_path = os.getenv("DATABASE_PATH", "jobs.db")
+        if pool_size is None:
+            pool_size = int(os.getenv("DATABASE_POOL_SIZE", "8"))
         self.db_path = db_path
+        
+        # One long-lived writer connection (serialized by a lock) plus a pool of readers.
+        # An in-memory database is private to its connection, so it only gets the writer.
+        self._writer = self._connect()
+        self._writer_lock = threading.Lock()
+        self._readers = queue.Queue()
+        self._stats_cache: Optional[Tuple[float, Dict[str, int]]] = None
+        # Bumped after every write; a stats read only fills the cache if no write finished meanwhile,
+        # so a snapshot taken just before a commit can't be cached after that commit invalidated it
+        self._write_generation = 0
+        self._stats_lock = threading.Lock()
+        if self.db_path != ":memory:":
+            for _ in range(pool_size):
+                self._readers.put(self._connect())
+        
         self.init_database()
     
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE in _transaction
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256,
+                               isolation_level=None)
+        # Per-connection tuning (journal_mode=WAL is persistent and set in init_database)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Wait on a lock held by another process (e.g. a second server or the sqlite3 CLI) instead of failing
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
         return conn
     
+    @staticmethod
+    @contextmanager
+    def _transaction(conn: sqlite3.Connection):
+        """Run a block in a write transaction that takes the write lock up front"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    
+    @contextmanager
+    def get_connection(self, readonly: bool = False):
+        """Check out a pooled connection; writes go through the shared writer connection"""
+        if readonly and self.db_path != ":memory:":
+            conn = self._readers.get()
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+        else:
+            # Blocks the calling thread while another write holds the lock; async callers should
+            # run write methods in a worker thread (asyncio.to_thread)
+            with self._writer_lock:
+                try:
+                    # Commits on success, rolls back on error
+                    with self._transaction(self._writer) as conn:
+                        yield conn
+                finally:
+                    with self._stats_lock:
+                        self._write_generation += 1
+                        self._stats_cache = None
+    
     def init_database(self):
         """Initialize database with jobs table and populate with 100,000 jobs if empty"""
-        with self.get_connection() as conn:
-            # Create jobs table
+        with self._writer_lock:
+            conn = self._writer
+            
+            # Page size can only be chosen before the first table exists (and before WAL is enabled)
+            if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+                conn.execute("PRAGMA page_size=8192")
+            
+            # WAL lets readers proceed while a writer is active (not supported for in-memory DBs)
+            if self.db_path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            
+            # Schema changes and the initial seed run in a single transaction
+            with self._transaction(conn):
+                needs_analyze = self._create_schema(conn)
+            
+            if needs_analyze:
+                # Give the query planner statistics for the fresh data / new index
+                conn.execute("ANALYZE")
+            # Refresh planner statistics that have drifted since the last run (cheap when nothing changed)
+            conn.execute("PRAGMA optimize")
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> bool:
+        """Create or migrate tables, indexes and triggers; returns True if the jobs table was seeded or indexed"""
+        # Create jobs table
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                status TEXT DEFAULT 'inactive',
+                created_at INTEGER DEFAULT (strftime('%s', 'now')),
+                updated_at INTEGER DEFAULT (strftime('%s', 'now')),
+                start_time INTEGER NULL,
+                worker_url TEXT NULL
+            )
+        """)
+        
+        # Add start_time column if it doesn't exist (for existing databases)
+        try:
+            conn.execute("ALTER TABLE jobs ADD COLUMN start_time TIMESTAMP NULL")
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+            
+        # Add worker_url column if it doesn't exist (for existing databases)
+        try:
+            conn.execute("ALTER TABLE jobs ADD COLUMN worker_url TEXT NULL")
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+            
+        # Add starred column if it doesn't exist (for existing databases)
+        try:
+            conn.execute("ALTER TABLE jobs ADD COLUMN starred BOOLEAN DEFAULT FALSE")
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+            
+        # Add image_url column if it doesn't exist (for existing databases)
+        try:
+            conn.execute("ALTER TABLE jobs ADD COLUMN image_url TEXT NULL")
+        except sqlite3.OperationalError:
+            # Column already exists
+            pass
+        
+        # Timestamps are stored as INTEGER unix seconds; convert rows written as ISO-8601 strings
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
             conn.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id INTEGER PRIMARY KEY,
-                    status TEXT DEFAULT 'inactive',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    start_time TIMESTAMP NULL,
-                    worker_url TEXT NULL
-                )
+                UPDATE jobs SET
+                    created_at = CAST(strftime('%s', created_at) AS INTEGER),
+                    updated_at = CAST(strftime('%s', updated_at) AS INTEGER),
+                    start_time = CAST(strftime('%s', start_time) AS INTEGER)
+                WHERE typeof(created_at) = 'text' OR typeof(updated_at) = 'text' OR typeof(start_time) = 'text'
             """)
+            conn.execute("PRAGMA user_version = 1")
+        
+        # Check if we need to populate
+        count = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        seeded = count == 0
+        if seeded:
+            print("Populating database with 100,000 jobs...")
+            # All jobs start as inactive for clean deployment. The ids are generated by a
+            # recursive CTE so the whole load is one statement that never leaves SQLite.
+            created_time = int(time.time())
+            total_jobs = 100000
             
-            # Add start_time column if it doesn't exist (for existing databases)
-            try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN start_time TIMESTAMP NULL")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            # Add worker_url column if it doesn't exist (for existing databases)
-            try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN worker_url TEXT NULL")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            # Add starred column if it doesn't exist (for existing databases)
-            try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN starred BOOLEAN DEFAULT FALSE")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-                
-            # Add image_url column if it doesn't exist (for existing databases)
-            try:
-                conn.execute("ALTER TABLE jobs ADD COLUMN image_url TEXT NULL")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-            
-            # Check if we need to populate
-            count = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
-            if count == 0:
-                print("Populating database with 100,000 jobs...")
-                # All jobs start as inactive for clean deployment
-                status = 'inactive'
-                
-                # Insert jobs in batches
-                batch_size = 1000
-                jobs_data = []
-                for i in range(100000):
-                    created_time = datetime.now(timezone.utc).isoformat()
-                    updated_time = created_time
-                    jobs_data.append((i + 1, status, created_time, updated_time))
-                    
-                    if len(jobs_data) >= batch_size:
-                        conn.executemany(
-                            "INSERT INTO jobs (id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                            jobs_data
-                        )
-                        jobs_data = []
-                
-                # Insert remaining jobs
-                if jobs_data:
-                    conn.executemany(
-                        "INSERT INTO jobs (id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
-                        jobs_data
-                    )
-                
-                conn.commit()
-                print("Database populated successfully!")
+            # Larger page cache while loading
+            conn.execute("PRAGMA cache_size=-262144")
+            conn.execute(
+                """
+                INSERT INTO jobs (id, status, created_at, updated_at)
+                WITH RECURSIVE seq(x) AS (VALUES(1) UNION ALL SELECT x + 1 FROM seq WHERE x < ?)
+                SELECT x, 'inactive', ?, ? FROM seq
+                """,
+                (total_jobs, created_time, created_time)
+            )
+            conn.execute("PRAGMA cache_size=-65536")
+            print("Database populated successfully!")
+        
+        # Index for status filters: turns get_next_job's "status = 'inactive' ORDER BY id LIMIT 1"
+        # into a single B-tree seek and lets status-filtered pages and counts skip the table scan.
+        # Created after seeding so the bulk insert doesn't maintain it row by row.
+        has_index = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_jobs_status_id'"
+        ).fetchone()
+        if not has_index:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_id ON jobs(status, id)")
+        
+        # Create the stats summary table and its triggers, seeding it from the current rows
+        has_stats = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_stats'"
+        ).fetchone()
+        if not has_stats:
+            for statement in JOB_STATS_SCHEMA:
+                conn.execute(statement)
+            conn.execute("INSERT INTO job_stats (status, count) SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        
+        return seeded or not has_index
+    
+    def close(self):
+        """Run PRAGMA optimize and close all pooled connections"""
+        with self._writer_lock:
+            self._writer.execute("PRAGMA optimize")
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
     
     def get_next_job(self, worker_url: Optional[str] = None) -> Optional[Dict]:
         """Get next available job and mark it as 'working'"""
         with self.get_connection() as conn:
-            # Use transaction to prevent race conditions
-            job = conn.execute(
-                "SELECT id, status, created_at, updated_at FROM jobs WHERE status = 'inactive' ORDER BY id LIMIT 1"
-            ).fetchone()
+            now = int(time.time())
+            if HAS_RETURNING:
+                # Pick and claim in one atomic statement
+                job = conn.execute(NEXT_JOB_SQL, (now, now, worker_url)).fetchone()
+                return dict(zip(JOB_FIELDS, job)) if job else None
             
-            if job:
-                # Mark as working with optional worker_url and start_time
-                now = datetime.now(timezone.utc).isoformat()
-                conn.execute(
-                    "UPDATE jobs SET status = 'working', updated_at = ?, start_time = ?, worker_url = ? WHERE id = ?",
-                    (now, now, worker_url, job['id'])
-                )
-                conn.commit()
-                
-                # Return updated job data
-                updated_job = conn.execute(
-                    "SELECT id, status, created_at, updated_at, start_time, worker_url, starred FROM jobs WHERE id = ?",
-                    (job['id'],)
-                ).fetchone()
-                return dict(updated_job) if updated_job else None
-            return None
+            # Older SQLite: the write lock is already held, so no other process can grab the same job
+            job = conn.execute(SELECT_NEXT_INACTIVE_SQL).fetchone()
+            if not job:
+                return None
+            conn.execute(START_JOB_SQL, (now, now, worker_url, job[0]))
+            updated_job = conn.execute(SELECT_JOB_SQL, (job[0],)).fetchone()
+            return dict(zip(JOB_FIELDS, updated_job)) if updated_job else None
     
-    def update_job_status(self, job_id: int, status: str) -> bool:
-        """Update job status"""
+    def get_next_jobs(self, count: int, worker_url: Optional[str] = None) -> List[int]:
+        """Claim up to `count` of the next available jobs as 'working', returning their IDs"""
         with self.get_connection() as conn:
-            if status == 'working':
-                # When marking as working, keep existing worker_url and start_time
-                cursor = conn.execute(
-                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
-                    (status, datetime.now(timezone.utc).isoformat(), job_id)
-                )
+            now = int(time.time())
+            if HAS_RETURNING:
+                rows = conn.execute(NEXT_JOBS_SQL, (now, now, worker_url, count)).fetchall()
             else:
-                # When marking as complete/error/flagged/inactive, clear worker fields
-                cursor = conn.execute(
-                    "UPDATE jobs SET status = ?, updated_at = ?, worker_url = NULL, start_time = NULL WHERE id = ?",
-                    (status, datetime.now(timezone.utc).isoformat(), job_id)
-                )
-            conn.commit()
-            return cursor.rowcount > 0
+                rows = conn.execute(SELECT_NEXT_INACTIVE_IDS_SQL, (count,)).fetchall()
+                conn.executemany(START_JOB_SQL, [(now, now, worker_url, row[0]) for row in rows])
+            return sorted(row[0] for row in rows)
     
-    def get_jobs(self, limit: int = 20, offset: int = 0, status: Optional[str] = None) -> List[Dict]:
-        """Get paginated list of jobs"""
-        with self.get_connection() as conn:
-            if status:
-                jobs = conn.execute(
-                    "SELECT id, status, created_at, updated_at, start_time, worker_url, starred FROM jobs WHERE status = ? ORDER BY id LIMIT ? OFFSET ?",
-                    (status, limit, offset)
-                ).fetchall()
-            else:
-                jobs = conn.execute(
-                    "SELECT id, status, created_at, updated_at, start_time, worker_url, starred FROM jobs ORDER BY id LIMIT ? OFFSET ?",
-                    (limit, offset)
-                ).fetchall()
-            return [dict(job) for job in jobs]
+    @staticmethod
+    def _page_query(limit: int, offset: int, status: Optional[str],
+                    after_id: Optional[int]) -> Tuple[Tuple[str, str], tuple]:
+        """Pick the prebuilt page SQL for this filter shape and its parameters"""
+        keyset = after_id is not None
+        params = (after_id, limit) if keyset else (limit, offset)
+        if status:
+            params = (status,) + params
+        return JOBS_PAGE_SQL[(bool(status), keyset)], params
+    
+    def get_jobs(self, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                 after_id: Optional[int] = None) -> List[Dict]:
+        """Get paginated list of jobs, using keyset pagination when after_id is given"""
+        (sql, _), params = self._page_query(limit, offset, status, after_id)
+        with self.get_connection(readonly=True) as conn:
+            jobs = conn.execute(sql, params).fetchall()
+            return [dict(zip(JOB_FIELDS, job)) for job in jobs]
+    
+    def get_jobs_json(self, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+                      after_id: Optional[int] = None) -> Tuple[bytes, Optional[int]]:
+        """Like get_jobs, but returns (JSON array of the page's jobs, last id on the page) built by SQLite"""
+        (_, sql), params = self._page_query(limit, offset, status, after_id)
+        with self.get_connection(readonly=True) as conn:
+            row = conn.execute(sql, params).fetchone()
+            return row[0], row[1]
     
     def get_total_count(self, status: Optional[str] = None) -> int:
         """Get total count of jobs"""
-        with self.get_connection() as conn:
-            if status:
-                count = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()[0]
-            else:
-                count = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
-            return count
+        # Served from the trigger-maintained job_stats counts (and their short-lived cache)
+        stats = self.get_stats()
+        if status:
+            return stats.get(status, 0)
+        return sum(stats.values())
     
     def get_job_by_id(self, job_id: int) -> Optional[Dict]:
         """Get specific job by ID"""
-        with self.get_connection() as conn:
-            job = conn.execute(
-                "SELECT id, status, created_at, updated_at, start_time, worker_url, starred FROM jobs WHERE id = ?",
-                (job_id,)
-            ).fetchone()
-            return dict(job) if job else None
+        with self.get_connection(readonly=True) as conn:
+            job = conn.execute(SELECT_JOB_SQL, (job_id,)).fetchone()
+            return dict(zip(JOB_FIELDS, job)) if job else None
     
     def claim_job(self, job_id: int, worker_url: Optional[str] = None) -> bool:
         """Claim a specific job (mark as working)"""
         with self.get_connection() as conn:
-            current_time = datetime.now(timezone.utc).isoformat()
-            cursor = conn.execute(
-                "UPDATE jobs SET status = 'working', updated_at = ?, start_time = ?, worker_url = ? WHERE id = ? AND status = 'inactive'",
-                (current_time, current_time, worker_url, job_id)
-            )
-            conn.commit()
+            current_time = int(time.time())
+            cursor = conn.execute(CLAIM_JOB_SQL, (current_time, current_time, worker_url, job_id))
             return cursor.rowcount > 0
     
     def update_job_status(self, job_id: int, status: str) -> bool:
         """Update job status and clear start_time/worker_url if not working"""
         with self.get_connection() as conn:
-            current_time = datetime.now(timezone.utc).isoformat()
-            if status == 'working':
-                # Keep existing start_time and worker_url if moving to working status
-                cursor = conn.execute(
-                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
-                    (status, current_time, job_id)
-                )
-            else:
-                # Clear start_time and worker_url if moving away from working status
-                cursor = conn.execute(
-                    "UPDATE jobs SET status = ?, updated_at = ?, start_time = NULL, worker_url = NULL WHERE id = ?",
-                    (status, current_time, job_id)
-                )
-            conn.commit()
+            cursor = conn.execute(UPDATE_STATUS_SQL, (status, int(time.time()), job_id))
             return cursor.rowcount > 0
     
+    def update_job_statuses(self, updates: List[Tuple[int, str]]) -> int:
+        """Update many (job_id, status) pairs in one transaction; returns the number of jobs updated"""
+        with self.get_connection() as conn:
+            current_time = int(time.time())
+            cursor = conn.executemany(
+                UPDATE_STATUS_SQL, [(status, current_time, job_id) for job_id, status in updates]
+            )
+            return cursor.rowcount
+    
+    def bulk_reset(self, status: Optional[str] = None) -> List[int]:
+        """Reset jobs in `status` (or every non-inactive job) to inactive in one statement, returning their IDs"""
+        if status:
+            where, params = "status = ?", (status,)
+        else:
+            where, params = "status != 'inactive'", ()
+        with self.get_connection() as conn:
+            current_time = int(time.time())
+            if HAS_RETURNING:
+                rows = conn.execute(RESET_JOBS_SQL + where + " RETURNING id", (current_time, *params)).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM jobs WHERE " + where, params).fetchall()
+                conn.execute(RESET_JOBS_SQL + where, (current_time, *params))
+            return sorted(row[0] for row in rows)
+    
+    def reset_flagged(self) -> List[int]:
+        """Reset every flagged job to inactive, returning the reset job IDs"""
+        return self.bulk_reset("flagged")
+    
     def get_stats(self) -> Dict[str, int]:
         """Get job statistics by status"""
-        with self.get_connection() as conn:
-            stats = {}
-            rows = conn.execute(
-                "SELECT status, COUNT(*) as count FROM jobs GROUP BY status"
-            ).fetchall()
-            for row in rows:
-                stats[row['status']] = row['count']
-            return stats
+        cached = self._stats_cache
+        if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL:
+            return dict(cached[1])
+        
+        generation = self._write_generation
+        with self.get_connection(readonly=True) as conn:
+            stats = dict(conn.execute(STATS_SQL).fetchall())
+        with self._stats_lock:
+            if self._write_generation == generation:
+                self._stats_cache = (time.monotonic(), stats)
+        return dict(stats)
     
     def get_job_stats(self) -> Dict[str, int]:
         """Alias for get_stats for backward compatibility"""
@@ -226,12 +430,11 @@ class JobDatabase:
                 return False
                 
             # Toggle the starred status
-            new_starred = not bool(row['starred'])
-            current_time = datetime.now(timezone.utc).isoformat()
+            new_starred = not bool(row[0])
+            current_time = int(time.time())
             
             cursor = conn.execute(
                 "UPDATE jobs SET starred = ?, updated_at = ? WHERE id = ?",
                 (new_starred, current_time, job_id)
             )
-            conn.commit()
             return cursor.rowcount > 0
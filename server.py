@@ -1,12 +1,16 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.routing import APIRoute
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import List, Optional, Set
-import json
 import asyncio
+import orjson
 import os
-from datetime import datetime, timezone
+import time
+import zlib
+from functools import lru_cache
 from database import JobDatabase
 
 # Load environment variables from .env file
@@ -17,19 +21,85 @@ except ImportError:
     # dotenv not available, use regular env vars
     pass
 
-app = FastAPI(title="Render Queue Tracker", version="1.0.0")
+# Cap on a gunzipped request body, so a tiny compressed upload can't expand to gigabytes in memory
+MAX_DECOMPRESSED_BODY = 10 * 1024 * 1024  # bytes
+
+class GzipRequest(Request):
+    """Request whose body is transparently gunzipped when sent with Content-Encoding: gzip"""
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    body = decompressor.decompress(body, MAX_DECOMPRESSED_BODY)
+                except zlib.error:
+                    raise HTTPException(status_code=400, detail="Invalid gzip request body")
+                if decompressor.unconsumed_tail:
+                    raise HTTPException(status_code=413, detail="Decompressed request body too large")
+                if not decompressor.eof:
+                    raise HTTPException(status_code=400, detail="Truncated gzip request body")
+            self._body = body
+        return self._body
+
+class GzipRoute(APIRoute):
+    """Route that accepts gzip-compressed request bodies (workers compress large batch updates)"""
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+        
+        async def route_handler(request: Request):
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+        
+        return route_handler
+
+app = FastAPI(title="Render Queue Tracker", version="1.0.0", default_response_class=ORJSONResponse)
+app.router.route_class = GzipRoute
+# Compress large responses (e.g. /jobs pages); small ones aren't worth the framing overhead
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 app.mount("/renders", StaticFiles(directory="renders"), name="renders")
 
-# Database instance
+# Database instance. Every endpoint runs its db calls via asyncio.to_thread: writes wait on a
+# threading.Lock (e.g. behind a 100k-row reset) and large reads take milliseconds, which must
+# block a worker thread, never the event loop. Concurrent reads then each check out their own
+# connection from the reader pool (DATABASE_POOL_SIZE).
 db = JobDatabase()
 
+# Broadcast coalescing: events queued within this window go out as one message
+BROADCAST_WINDOW = 0.02  # seconds
+MAX_BROADCAST_BATCH = 500
+
 # WebSocket connection manager
 class ConnectionManager:
     def __init__(self):
         self.active_connections: Set[WebSocket] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.pump_task: Optional[asyncio.Task] = None
+
+    def publish(self, data: dict):
+        """Queue an event for the broadcast pump instead of sending it inline"""
+        self.queue.put_nowait(data)
+
+    async def run_broadcast_pump(self):
+        """Drain queued events and send them to clients in coalesced batches"""
+        while True:
+            events = [await self.queue.get()]
+            # Let a burst accumulate briefly, then take everything that arrived
+            await asyncio.sleep(BROADCAST_WINDOW)
+            while len(events) < MAX_BROADCAST_BATCH and not self.queue.empty():
+                events.append(self.queue.get_nowait())
+            
+            if not self.active_connections:
+                continue
+            try:
+                if len(events) == 1:
+                    await self.broadcast(events[0])
+                else:
+                    await self.broadcast({"type": "bulk_updates", "items": events})
+            except Exception as e:
+                print(f"⚠️ Error broadcasting updates: {e}")
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -40,21 +110,102 @@ class ConnectionManager:
 
     async def broadcast(self, data: dict):
         """Broadcast message to all connected clients"""
-        message = json.dumps(data)
-        disconnected = []
+        message = orjson.dumps(data).decode()
+        connections = list(self.active_connections)
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception:
-                disconnected.append(connection)
+        # Send to every client concurrently so one slow socket doesn't hold up the rest
+        results = await asyncio.gather(
+            *(connection.send_text(message) for connection in connections),
+            return_exceptions=True
+        )
         
         # Remove disconnected connections
-        for connection in disconnected:
-            self.active_connections.discard(connection)
+        self.active_connections -= {
+            connection for connection, result in zip(connections, results)
+            if isinstance(result, Exception)
+        }
 
 manager = ConnectionManager()
 
+# Long-polling /next-job callers wait on this; it is set whenever jobs go back to inactive.
+# They also re-check every LONG_POLL_INTERVAL in case another process freed jobs.
+jobs_available = asyncio.Event()
+LONG_POLL_INTERVAL = 1.0  # seconds
+MAX_LONG_POLL_WAIT = 60.0  # seconds
+
+def notify_jobs_available():
+    """Wake every long-polling /next-job request"""
+    jobs_available.set()
+    jobs_available.clear()
+
+@app.on_event("startup")
+async def start_broadcast_pump():
+    manager.pump_task = asyncio.create_task(manager.run_broadcast_pump())
+
+@app.on_event("shutdown")
+async def shutdown():
+    if manager.pump_task:
+        manager.pump_task.cancel()
+    db.close()
+
+# Fallback traits if traits.json doesn't exist or is malformed
+DEFAULT_TRAITS = {
+    "prompt": "a man wearing a gray t-shirt, short hair, in a urban alley background",
+    "filename": "gray_tshirt_short_hair"
+}
+
+TRAITS_PATH = "traits.json"
+
+@lru_cache(maxsize=1)
+def load_traits(mtime: float) -> tuple[dict, list]:
+    """Parse traits.json; cached per file mtime so it is only re-read when the file changes"""
+    try:
+        with open(TRAITS_PATH, "rb") as f:
+            traits = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        traits = {}
+    return traits, list(traits.keys())
+
+def get_traits() -> tuple[dict, list]:
+    """Return (traits, trait keys), reloading traits.json only if it was modified"""
+    try:
+        mtime = os.path.getmtime(TRAITS_PATH)
+    except OSError:
+        return {}, []
+    return load_traits(mtime)
+
+# Maximum number of Wasabi delete requests in flight at once
+WASABI_DELETE_CONCURRENCY = 32
+# S3 DeleteObjects accepts at most 1000 keys per request
+WASABI_DELETE_BATCH = 1000
+
+_s3_client = None
+
+def get_s3_client():
+    """Return a shared boto3 client for Wasabi, created on first use (boto3 clients are thread-safe)"""
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        
+        _s3_client = boto3.client(
+            's3',
+            endpoint_url=os.getenv("WASABI_ENDPOINT_URL", "https://s3.eu-west-2.wasabisys.com"),
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name='eu-west-2'
+        )
+    return _s3_client
+
+async def gather_bounded(coroutine_fn, items, limit: int = WASABI_DELETE_CONCURRENCY) -> list:
+    """Run coroutine_fn over items concurrently with at most `limit` running at once"""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(item):
+        async with semaphore:
+            return await coroutine_fn(item)
+    
+    return await asyncio.gather(*(run(item) for item in items))
+
 async def delete_wasabi_file(job_id: int) -> tuple[bool, str]:
     """
     Helper function to delete a file from Wasabi S3
@@ -70,33 +221,28 @@ async def delete_wasabi_file(job_id: int) -> tuple[bool, str]:
         if aws_access_key and aws_secret_key:
             # Use boto3 for Wasabi operations
             try:
-                import boto3
                 from botocore.exceptions import ClientError
                 
-                # Configure boto3 client for Wasabi
-                s3_client = boto3.client(
-                    's3',
-                    endpoint_url=os.getenv("WASABI_ENDPOINT_URL", "https://s3.eu-west-2.wasabisys.com"),
-                    aws_access_key_id=aws_access_key,
-                    aws_secret_access_key=aws_secret_key,
-                    region_name='eu-west-2'
-                )
-                
+                s3_client = get_s3_client()
                 bucket_name = os.getenv("WASABI_BUCKET_NAME", "tabcorp-data")
                 prefix = os.getenv("WASABI_PREFIX", "simtest4")
                 object_key = f"{prefix}/{filename}"
                 
                 # Check if file exists and delete it
-                try:
-                    s3_client.head_object(Bucket=bucket_name, Key=object_key)
-                    # File exists, delete it
-                    s3_client.delete_object(Bucket=bucket_name, Key=object_key)
-                    return True, f"Successfully deleted {filename} from Wasabi (boto3)"
-                except ClientError as e:
-                    if e.response['Error']['Code'] == '404':
-                        return False, f"File {filename} not found on Wasabi"
-                    else:
-                        raise e
+                def delete_object() -> tuple[bool, str]:
+                    try:
+                        s3_client.head_object(Bucket=bucket_name, Key=object_key)
+                        # File exists, delete it
+                        s3_client.delete_object(Bucket=bucket_name, Key=object_key)
+                        return True, f"Successfully deleted {filename} from Wasabi (boto3)"
+                    except ClientError as e:
+                        if e.response['Error']['Code'] == '404':
+                            return False, f"File {filename} not found on Wasabi"
+                        else:
+                            raise e
+                
+                # boto3 is blocking; run it in a thread so concurrent deletes overlap
+                return await asyncio.to_thread(delete_object)
                         
             except ImportError:
                 return False, "boto3 not available"
@@ -105,7 +251,6 @@ async def delete_wasabi_file(job_id: int) -> tuple[bool, str]:
                 
         else:
             # Fallback to rclone (for local development)
-            import asyncio
             wasabi_path = f"wasabi:tabcorp-data/simtest4/{filename}"
             
             # Check if file exists on Wasabi
@@ -137,29 +282,71 @@ async def delete_wasabi_file(job_id: int) -> tuple[bool, str]:
     except Exception as e:
         return False, f"Error deleting file from Wasabi: {str(e)}"
 
-def calculate_elapsed_time(start_time_str: Optional[str]) -> Optional[int]:
-    """Calculate elapsed time in seconds from start_time string"""
-    if not start_time_str:
-        return None
+async def delete_wasabi_keys(keys: List[str]) -> tuple[Set[str], dict]:
+    """
+    Delete object keys from the Wasabi bucket with batched DeleteObjects requests
+    Returns (deleted keys, {key: error message})
+    """
+    s3_client = get_s3_client()
+    bucket_name = os.getenv("WASABI_BUCKET_NAME", "tabcorp-data")
+    
+    def delete_batch(batch: List[str]) -> dict:
+        return s3_client.delete_objects(
+            Bucket=bucket_name,
+            Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': False}
+        )
+    
+    async def run_batch(batch: List[str]) -> dict:
+        # boto3 is blocking; run it in a thread so batches overlap
+        return await asyncio.to_thread(delete_batch, batch)
     
+    batches = [keys[i:i + WASABI_DELETE_BATCH] for i in range(0, len(keys), WASABI_DELETE_BATCH)]
+    deleted = set()
+    errors = {}
+    for response in await gather_bounded(run_batch, batches):
+        deleted.update(obj['Key'] for obj in response.get('Deleted', []))
+        for error in response.get('Errors', []):
+            errors[error['Key']] = f"{error.get('Code')}: {error.get('Message')}"
+    return deleted, errors
+
+async def delete_wasabi_files(job_ids: List[int]) -> List[tuple[bool, str]]:
+    """
+    Request deletion of the Wasabi files for many jobs; returns one (success, message) per job
+    With boto3 this issues one DeleteObjects request per 1000 jobs (no per-file existence check).
+    DeleteObjects reports every key as deleted, including ones that never existed, so success
+    there only means the delete was accepted. The rclone fallback checks and deletes files one
+    by one, several at a time.
+    """
+    if not (os.getenv("AWS_ACCESS_KEY_ID") and os.getenv("AWS_SECRET_ACCESS_KEY")):
+        return await gather_bounded(delete_wasabi_file, job_ids)
+    
+    prefix = os.getenv("WASABI_PREFIX", "simtest4")
+    keys = [f"{prefix}/{job_id}.png" for job_id in job_ids]
     try:
-        start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-        if start_time.tzinfo is None:
-            start_time = start_time.replace(tzinfo=timezone.utc)
-        
-        current_time = datetime.now(timezone.utc)
-        elapsed = current_time - start_time
-        return int(elapsed.total_seconds())
-    except Exception:
-        return None
+        deleted, errors = await delete_wasabi_keys(keys)
+    except ImportError:
+        return [(False, "boto3 not available")] * len(job_ids)
+    except Exception as e:
+        return [(False, f"boto3 error: {str(e)}")] * len(job_ids)
+    
+    results = []
+    for job_id, key in zip(job_ids, keys):
+        filename = f"{job_id}.png"
+        if key in deleted:
+            results.append((True, f"Delete requested for {filename} on Wasabi (boto3)"))
+        elif key in errors:
+            results.append((False, f"Failed to delete {filename} from Wasabi: {errors[key]}"))
+        else:
+            results.append((False, f"File {filename} was not reported as deleted by Wasabi"))
+    return results
 
 # Pydantic models
 class JobResponse(BaseModel):
     id: int
     status: str
-    created_at: str
-    updated_at: str
-    start_time: Optional[str] = None
+    created_at: int  # unix seconds
+    updated_at: int  # unix seconds
+    start_time: Optional[int] = None  # unix seconds
     elapsed_time: Optional[int] = None  # seconds
     worker_url: Optional[str] = None
     starred: bool = False
@@ -167,8 +354,9 @@ class JobResponse(BaseModel):
 class JobsResponse(BaseModel):
     jobs: List[JobResponse]
     total: int
-    page: int
+    page: Optional[int] = None  # null for status-filtered keyset requests, where it can't be known
     limit: int
+    last_id: Optional[int] = None  # pass back as after_id to fetch the next page
 
 class StatsResponse(BaseModel):
     stats: dict
@@ -176,6 +364,13 @@ class StatsResponse(BaseModel):
 class JobUpdate(BaseModel):
     status: str
 
+class JobStatusUpdate(BaseModel):
+    job_id: int
+    status: str
+
+class BulkJobUpdate(BaseModel):
+    updates: List[JobStatusUpdate]
+
 class ClaimJobRequest(BaseModel):
     worker_url: Optional[str] = None
 
@@ -195,45 +390,38 @@ async def websocket_endpoint(websocket: WebSocket):
 
 # API Routes
 
-@app.get("/jobs")
-async def get_jobs(limit: int = 20, offset: int = 0, status: Optional[str] = None):
-    """Get paginated list of jobs"""
+@app.get("/jobs", response_model=JobsResponse)
+async def get_jobs(limit: int = 20, offset: int = 0, status: Optional[str] = None, after_id: Optional[int] = None):
+    """Get paginated list of jobs (pass after_id for keyset pagination; offset is kept for older clients)"""
     try:
-        jobs = db.get_jobs(limit=limit, offset=offset, status=status)
-        total = db.get_total_count(status=status)
-        
-        job_responses = []
-        for job in jobs:
-            elapsed_time = None
-            if job['status'] == 'working' and job.get('start_time'):
-                elapsed_time = calculate_elapsed_time(job['start_time'])
-            
-            job_responses.append(JobResponse(
-                id=job['id'],
-                status=job['status'],
-                created_at=job['created_at'],
-                updated_at=job['updated_at'],
-                start_time=job.get('start_time'),
-                elapsed_time=elapsed_time,
-                worker_url=job.get('worker_url'),
-                starred=bool(job.get('starred', False))
-            ))
-        
-        return JobsResponse(
-            jobs=job_responses,
-            total=total,
-            page=offset // limit,
-            limit=limit
+        jobs_json, last_id = await asyncio.to_thread(
+            db.get_jobs_json, limit=limit, offset=offset, status=status, after_id=after_id
+        )
+        total = await asyncio.to_thread(db.get_total_count, status=status)
+        
+        # Hot path: SQLite renders the jobs array itself, so rows never become Python objects;
+        # only the small envelope is assembled here (JobsResponse documents the shape)
+        if after_id is None:
+            page = offset // limit
+        elif not status:
+            # Job ids are contiguous from 1, so an unfiltered cursor maps straight to a page
+            page = after_id // limit
+        else:
+            page = None
+        envelope = (f',"total":{total},"page":{"null" if page is None else page},"limit":{limit},'
+                    f'"last_id":{"null" if last_id is None else last_id}}}')
+        return Response(
+            content=b'{"jobs":' + jobs_json + envelope.encode(),
+            media_type="application/json"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/stats")
+@app.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """Get job statistics"""
     try:
-        stats = db.get_stats()
-        return StatsResponse(stats=stats)
+        return ORJSONResponse({"stats": await asyncio.to_thread(db.get_stats)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -241,21 +429,17 @@ async def get_stats():
 async def get_job(job_id: int):
     """Get specific job details"""
     try:
-        job = db.get_job_by_id(job_id)
+        job = await asyncio.to_thread(db.get_job_by_id, job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        elapsed_time = None
-        if job['status'] == 'working' and job.get('start_time'):
-            elapsed_time = calculate_elapsed_time(job['start_time'])
-        
         return JobResponse(
             id=job['id'],
             status=job['status'],
             created_at=job['created_at'],
             updated_at=job['updated_at'],
             start_time=job.get('start_time'),
-            elapsed_time=elapsed_time,
+            elapsed_time=job['elapsed_time'],
             worker_url=job.get('worker_url'),
             starred=bool(job.get('starred', False))
         )
@@ -266,12 +450,14 @@ async def get_job(job_id: int):
 async def update_job_status(job_id: int, job_update: JobUpdate):
     """Update job status"""
     try:
-        success = db.update_job_status(job_id, job_update.status)
+        success = await asyncio.to_thread(db.update_job_status, job_id, job_update.status)
         if not success:
             raise HTTPException(status_code=404, detail="Job not found")
+        if job_update.status == "inactive":
+            notify_jobs_available()
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job_id,
             "status": job_update.status
@@ -281,16 +467,42 @@ async def update_job_status(job_id: int, job_update: JobUpdate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/jobs/status")
+async def update_job_statuses(bulk_update: BulkJobUpdate):
+    """Update the status of many jobs in a single transaction"""
+    try:
+        updated_count = await asyncio.to_thread(
+            db.update_job_statuses,
+            [(update.job_id, update.status) for update in bulk_update.updates]
+        )
+        
+        if any(update.status == "inactive" for update in bulk_update.updates):
+            notify_jobs_available()
+        
+        # Broadcast one aggregated update to all connected clients
+        if updated_count:
+            manager.publish({
+                "type": "bulk_update",
+                "count": updated_count
+            })
+        
+        return {
+            "message": f"Updated {updated_count} jobs",
+            "updated_count": updated_count
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/job/{job_id}/claim")
 async def claim_job(job_id: int, request: ClaimJobRequest = ClaimJobRequest()):
     """Claim a specific job"""
     try:
-        success = db.claim_job(job_id, request.worker_url)
+        success = await asyncio.to_thread(db.claim_job, job_id, request.worker_url)
         if not success:
             raise HTTPException(status_code=404, detail="Job not found or already claimed")
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job_id,
             "status": "working"
@@ -300,16 +512,41 @@ async def claim_job(job_id: int, request: ClaimJobRequest = ClaimJobRequest()):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def claim_with_wait(claim, http_request: Request, wait: float):
+    """
+    Run the blocking `claim()` in a worker thread, retrying for up to `wait` seconds while it
+    finds nothing; returns its last result (falsy if the wait ran out)
+    """
+    deadline = time.monotonic() + wait
+    result = await asyncio.to_thread(claim)
+    while not result:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return result
+        try:
+            await asyncio.wait_for(jobs_available.wait(), timeout=min(remaining, LONG_POLL_INTERVAL))
+        except asyncio.TimeoutError:
+            pass
+        # Don't claim jobs for a worker that has already given up waiting
+        if await http_request.is_disconnected():
+            raise HTTPException(status_code=499, detail="Client disconnected")
+        result = await asyncio.to_thread(claim)
+    return result
+
 @app.post("/next-job")
-async def get_next_job(request: ClaimJobRequest = ClaimJobRequest()):
-    """Get the next available job and claim it"""
+async def get_next_job(
+    http_request: Request,
+    wait: float = Query(0, ge=0, le=MAX_LONG_POLL_WAIT, allow_inf_nan=False),
+    request: ClaimJobRequest = ClaimJobRequest()
+):
+    """Get the next available job and claim it, holding the request up to `wait` seconds for one to appear"""
     try:
-        job = db.get_next_job(request.worker_url)
+        job = await claim_with_wait(lambda: db.get_next_job(request.worker_url), http_request, wait)
         if not job:
             raise HTTPException(status_code=404, detail="No jobs available")
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job['id'],
             "status": "working"
@@ -321,10 +558,43 @@ async def get_next_job(request: ClaimJobRequest = ClaimJobRequest()):
             created_at=job['created_at'],
             updated_at=job['updated_at'],
             start_time=job.get('start_time'),
-            elapsed_time=calculate_elapsed_time(job.get('start_time')),
+            elapsed_time=job['elapsed_time'],
             worker_url=job.get('worker_url'),
             starred=bool(job.get('starred', False))
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Upper bound on how many jobs one /next-jobs call may claim
+MAX_NEXT_JOBS = 1000
+
+@app.post("/next-jobs")
+async def get_next_jobs(
+    http_request: Request,
+    count: int = 16,
+    wait: float = Query(0, ge=0, le=MAX_LONG_POLL_WAIT, allow_inf_nan=False),
+    request: ClaimJobRequest = ClaimJobRequest()
+):
+    """Claim up to `count` of the next available jobs in one round trip, waiting up to `wait` seconds for any"""
+    try:
+        count = max(1, min(count, MAX_NEXT_JOBS))
+        job_ids = await claim_with_wait(
+            lambda: db.get_next_jobs(count, request.worker_url), http_request, wait
+        )
+        
+        if job_ids:
+            manager.publish({
+                "type": "bulk_update",
+                "to": "working",
+                "ids": job_ids,
+                "count": len(job_ids)
+            })
+        
+        return {"job_ids": job_ids}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -332,12 +602,12 @@ async def get_next_job(request: ClaimJobRequest = ClaimJobRequest()):
 async def flag_job(job_id: int):
     """Flag a job"""
     try:
-        success = db.update_job_status(job_id, "flagged")
+        success = await asyncio.to_thread(db.update_job_status, job_id, "flagged")
         if not success:
             raise HTTPException(status_code=404, detail="Job not found")
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job_id,
             "status": "flagged"
@@ -351,12 +621,12 @@ async def flag_job(job_id: int):
 async def toggle_star(job_id: int):
     """Toggle the starred status of a job"""
     try:
-        success = db.toggle_star(job_id)
+        success = await asyncio.to_thread(db.toggle_star, job_id)
         if not success:
             raise HTTPException(status_code=404, detail="Job not found")
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job_id,
             "field": "starred"
@@ -384,12 +654,13 @@ async def reset_job(job_id: int):
                 print(f"ℹ️ {message}")
         
         # Reset the job status (this happens regardless of Wasabi operation result)
-        success = db.update_job_status(job_id, "inactive")
+        success = await asyncio.to_thread(db.update_job_status, job_id, "inactive")
         if not success:
             raise HTTPException(status_code=404, detail="Job not found")
+        notify_jobs_available()
         
         # Broadcast update to all connected clients
-        await manager.broadcast({
+        manager.publish({
             "type": "job_update",
             "job_id": job_id,
             "status": "inactive"
@@ -407,42 +678,40 @@ async def reset_job(job_id: int):
 async def reset_all_flagged_jobs():
     """Reset all flagged jobs to inactive status and delete corresponding images from Wasabi"""
     try:
-        # Get all flagged jobs (use large limit to get all)
-        flagged_jobs = db.get_jobs(limit=10000, status="flagged")
-        reset_count = 0
-        deleted_files = 0
+        # Reset every flagged job with a single UPDATE, in a worker thread like every other write
+        reset_ids = await asyncio.to_thread(db.reset_flagged)
+        reset_count = len(reset_ids)
+        # Wasabi's batch delete doesn't say which files actually existed, so this counts requests
+        delete_requests = 0
         
         # Check if Wasabi deletion is enabled
         enable_wasabi = os.getenv("ENABLE_WASABI_DELETION", "true").lower() == "true"
         
-        for job in flagged_jobs:
-            job_id = job["id"]
-            
-            # Try to delete corresponding file from Wasabi if enabled
-            if enable_wasabi:
-                success, message = await delete_wasabi_file(job_id)
+        # Try to delete corresponding files from Wasabi if enabled
+        if enable_wasabi:
+            for success, message in await delete_wasabi_files(reset_ids):
                 if success:
-                    deleted_files += 1
+                    delete_requests += 1
                     print(f"✅ {message}")
                 else:
                     print(f"ℹ️ {message}")
-            
-            # Reset the job status
-            success = db.update_job_status(job_id, "inactive")
-            if success:
-                reset_count += 1
-                # Broadcast update to all connected clients for each job
-                await manager.broadcast({
-                    "type": "job_update",
-                    "job_id": job_id,
-                    "status": "inactive"
-                })
         
-        wasabi_message = f" and deleted {deleted_files} files from Wasabi" if enable_wasabi else ""
+        # One aggregated update instead of a broadcast per job
+        if reset_count:
+            notify_jobs_available()
+            manager.publish({
+                "type": "bulk_update",
+                "from": "flagged",
+                "to": "inactive",
+                "ids": reset_ids,
+                "count": reset_count
+            })
+        
+        wasabi_message = f" and requested deletion of {delete_requests} files from Wasabi" if enable_wasabi else ""
         return {
             "message": f"Successfully reset {reset_count} flagged jobs{wasabi_message}",
             "reset_count": reset_count,
-            "deleted_files": deleted_files if enable_wasabi else 0
+            "delete_requested_files": delete_requests if enable_wasabi else 0
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -450,34 +719,25 @@ async def reset_all_flagged_jobs():
 @app.post("/jobs/reset-all")
 async def reset_all_jobs():
     """Reset ALL jobs to inactive status and delete ALL images from Wasabi (nuclear option for testing)"""
-    import asyncio
-    import os
-    
     try:
-        # Get all jobs (use large limit to get all)
-        all_jobs = db.get_jobs(limit=10000)
-        reset_count = 0
+        # First, reset every job that is not already inactive with a single UPDATE (in a worker thread,
+        # since touching up to 100k rows would otherwise stall the event loop)
+        reset_ids = await asyncio.to_thread(db.bulk_reset)
+        reset_count = len(reset_ids)
         deleted_files = 0
         
         # Check if Wasabi deletion is enabled
         enable_wasabi = os.getenv("ENABLE_WASABI_DELETION", "true").lower() == "true"
         
-        # First, reset all jobs in the database
-        for job in all_jobs:
-            # Only reset jobs that are not already inactive
-            if job["status"] != "inactive":
-                job_id = job["id"]
-                
-                # Reset the job status
-                success = db.update_job_status(job_id, "inactive")
-                if success:
-                    reset_count += 1
-                    # Broadcast update to all connected clients for each job
-                    await manager.broadcast({
-                        "type": "job_update",
-                        "job_id": job_id,
-                        "status": "inactive"
-                    })
+        # One aggregated update instead of a broadcast per job
+        if reset_count:
+            notify_jobs_available()
+            manager.publish({
+                "type": "bulk_update",
+                "to": "inactive",
+                "ids": reset_ids,
+                "count": reset_count
+            })
         
         # NUCLEAR OPTION: Delete ALL files from Wasabi regardless of job existence
         if enable_wasabi:
@@ -488,31 +748,26 @@ async def reset_all_jobs():
                 
                 if aws_access_key and aws_secret_key:
                     # Use boto3 to list and delete all files
-                    import boto3
-                    from botocore.exceptions import ClientError
-                    
-                    s3_client = boto3.client(
-                        's3',
-                        endpoint_url=os.getenv("WASABI_ENDPOINT_URL", "https://s3.eu-west-2.wasabisys.com"),
-                        aws_access_key_id=aws_access_key,
-                        aws_secret_access_key=aws_secret_key,
-                        region_name='eu-west-2'
-                    )
-                    
+                    s3_client = get_s3_client()
                     bucket_name = os.getenv("WASABI_BUCKET_NAME", "tabcorp-data")
                     prefix = os.getenv("WASABI_PREFIX", "simtest4")
                     
-                    # List all objects in the prefix
-                    response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=f"{prefix}/")
+                    # List all objects in the prefix (every page, not just the first 1000)
+                    def list_keys() -> List[str]:
+                        paginator = s3_client.get_paginator('list_objects_v2')
+                        return [
+                            obj['Key']
+                            for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{prefix}/")
+                            for obj in page.get('Contents', [])
+                        ]
                     
-                    if 'Contents' in response:
-                        for obj in response['Contents']:
-                            try:
-                                s3_client.delete_object(Bucket=bucket_name, Key=obj['Key'])
-                                deleted_files += 1
-                                print(f"✅ Deleted {obj['Key']} from Wasabi (boto3)")
-                            except Exception as e:
-                                print(f"❌ Failed to delete {obj['Key']}: {e}")
+                    keys = await asyncio.to_thread(list_keys)
+                    if keys:
+                        deleted, errors = await delete_wasabi_keys(keys)
+                        deleted_files += len(deleted)
+                        print(f"✅ Deleted {len(deleted)} files from Wasabi (boto3)")
+                        for key, error in errors.items():
+                            print(f"❌ Failed to delete {key}: {error}")
                     
                 else:
                     # Fallback to rclone for local development
@@ -530,8 +785,8 @@ async def reset_all_jobs():
                         files = [f.strip().rstrip('/') for f in files if f.strip()]  # Remove trailing slashes
                         files = [f for f in files if f]  # Remove empty strings
                         
-                        # Delete each file
-                        for filename in files:
+                        # Delete each file, several rclone processes at a time
+                        async def delete_file(filename: str) -> bool:
                             try:
                                 delete_cmd = ["rclone", "delete", f"wasabi:tabcorp-data/simtest4/{filename}"]
                                 delete_result = await asyncio.create_subprocess_exec(
@@ -542,12 +797,16 @@ async def reset_all_jobs():
                                 stdout, stderr = await delete_result.communicate()
                                 
                                 if delete_result.returncode == 0:
-                                    deleted_files += 1
                                     print(f"✅ Deleted {filename} from Wasabi (rclone)")
+                                    return True
                                 else:
                                     print(f"❌ Failed to delete {filename}: {stderr.decode()}")
                             except Exception as e:
                                 print(f"❌ Error deleting {filename}: {e}")
+                            return False
+                        
+                        results = await gather_bounded(delete_file, files)
+                        deleted_files += sum(results)
                     else:
                         print(f"⚠️ Failed to list Wasabi files: {stderr.decode()}")
                         
@@ -565,32 +824,11 @@ async def reset_all_jobs():
 
 @app.get("/preview/{job_id}")
 async def get_job_preview(job_id: int):
-    # Load traits from traits.json
-    traits_data = {}
-    try:
-        import json
-        with open("traits.json", "r") as f:
-            all_traits = json.load(f)
-            # Use job_id to select traits from the dictionary
-            trait_key = str(job_id)
-            if trait_key in all_traits:
-                traits_data = all_traits[trait_key]
-            else:
-                # If job_id not found, cycle through available keys
-                available_keys = list(all_traits.keys())
-                if available_keys:
-                    key_index = (job_id - 1) % len(available_keys)
-                    traits_data = all_traits[available_keys[key_index]]
-                else:
-                    # Use fallback if no traits available
-                    raise KeyError("No traits available")
-    except (FileNotFoundError, json.JSONDecodeError, IndexError, KeyError):
-        # Fallback traits if file doesn't exist or is malformed
-        traits_data = {
-            "prompt": "a man wearing a gray t-shirt, short hair, in a urban alley background",
-            "filename": "gray_tshirt_short_hair"
-        }
-    
+    # Use job_id to select traits, cycling through available keys if job_id isn't present
+    all_traits, trait_keys = get_traits()
+    traits_data = all_traits.get(str(job_id))
+    if traits_data is None:
+        traits_data = all_traits[trait_keys[(job_id - 1) % len(trait_keys)]] if trait_keys else DEFAULT_TRAITS
     
     return {
         "traits": traits_data
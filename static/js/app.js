@@ -241,7 +241,11 @@ class RenderFlow {
         }
 
         handleWebSocketMessage(data) {
-          if (data.type === "job_update") {
+          if (
+            data.type === "job_update" ||
+            data.type === "bulk_update" ||
+            data.type === "bulk_updates"
+          ) {
             // Reload jobs to get complete updated data including elapsed_time and worker_url
             this.loadJobs();
             this.loadStats(); // Update stats
@@ -360,9 +364,11 @@ class RenderFlow {
 
         async loadJobs() {
           try {
+            // Job ids are contiguous from 1, so the page's first id is known up front;
+            // after_id lets the server seek straight to it instead of skipping OFFSET rows
             const params = new URLSearchParams({
               limit: this.limit,
-              offset: this.currentPage * this.limit,
+              after_id: this.currentPage * this.limit,
             });
 
             const response = await fetch(`/jobs?${params}`);
@@ -611,7 +617,7 @@ class RenderFlow {
                                 <div class="trait-item">
                                     <div class="trait-label">Updated</div>
                                     <div class="trait-value">${new Date(
-                                      job.updated_at
+                                      job.updated_at * 1000
                                     ).toLocaleString()}</div>
                                 </div>
                                 <div class="trait-item">
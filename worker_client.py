@@ -3,37 +3,350 @@
 Worker integration script for ComfyUI render queue
 This script should be deployed with ComfyUI workers to communicate with the central tracker
 """
+import asyncio
+import gzip
 import requests
 import json
-import os
-from typing import Optional
+import logging
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson decodes/encodes the tracker's JSON much faster when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# Render outputs are named "<job_id>.<ext>", e.g. "123.png"
+_JOBID_RE = re.compile(r"^(\d+)\.[A-Za-z0-9]+$")
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `limit` records per message template through every `period` seconds"""
+    def __init__(self, limit: int = 10, period: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            start, count = self._windows.get(record.msg, (now, 0))
+            if now - start >= self.period:
+                start, count = now, 0
+            self._windows[record.msg] = (start, count + 1)
+        return count < self.limit
+
+# Errors are rate limited so a tracker outage doesn't flood worker logs at request-timeout rate
+log = logging.getLogger("render_queue.client")
+log.addFilter(RateLimitFilter())
+
+# Transient failures (connection errors, 502/503/504) are retried with jittered exponential backoff
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 0.3  # seconds, doubled per attempt
+RETRY_JITTER = 0.5  # seconds
+
+def _retry(allowed_methods: Tuple[str, ...]) -> Retry:
+    """Build the urllib3 retry policy; only `allowed_methods` are retried after reaching the server"""
+    kwargs = dict(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF,
+                  status_forcelist=(502, 503, 504), allowed_methods=allowed_methods)
+    try:
+        return Retry(backoff_jitter=RETRY_JITTER, **kwargs)
+    except TypeError:
+        # urllib3 < 2 has no backoff_jitter
+        return Retry(**kwargs)
+
+JOB_STATUSES = ("inactive", "working", "complete", "done", "error", "flagged")
+JSON_HEADERS = {"Content-Type": "application/json"}
+GZIP_JSON_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+# Batch bodies at least this large are gzipped; below it compression costs more than it saves
+GZIP_MIN_SIZE = 1024
+
+def encode_json_body(payload) -> Tuple[bytes, dict]:
+    """Serialize a request payload, gzipping it when large enough; returns (body, headers)"""
+    body = json_dumps(payload)
+    if len(body) < GZIP_MIN_SIZE:
+        return body, JSON_HEADERS
+    return gzip.compress(body), GZIP_JSON_HEADERS
+
+# How many jobs' last-sent statuses are remembered to skip duplicate updates
+STATUS_CACHE_SIZE = 1024
+# ...and for this long, so only duplicates sent moments apart are skipped; older ones are resent
+# in case the job was reset on the tracker in the meantime
+STATUS_CACHE_TTL = 30.0  # seconds
+
+# Background status updates are sent in batches of up to this many, gathered over this window
+UPDATE_BATCH_SIZE = 32
+UPDATE_BATCH_WINDOW = 0.1  # seconds
+
+# requests_unixsocket is only needed for unix:// tracker URLs with RenderQueueClient
+try:
+    import requests_unixsocket
+except ImportError:
+    requests_unixsocket = None
+
+# httpx is only needed for AsyncRenderQueueClient
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+def extract_job_ids(filenames: Iterable[str]) -> List[int]:
+    """Return the job IDs of the filenames named like "123.png", skipping any others"""
+    return [int(m.group(1)) for filename in filenames if (m := _JOBID_RE.match(filename))]
+
+
+def unix_socket_path(tracker_url: str) -> Optional[str]:
+    """Return the socket path of a "unix:///run/render-tracker.sock" tracker URL, else None"""
+    if tracker_url.startswith("unix://"):
+        return tracker_url[len("unix://"):]
+    return None
+
 
 class RenderQueueClient:
-    def __init__(self, tracker_url: str = "http://localhost:8000"):
+    def __init__(self, tracker_url: str = "http://localhost:8000", prefetch: int = 1,
+                 background_updates: bool = False, warmup: bool = False):
         """
         Initialize the render queue client
         
         Args:
-            tracker_url: URL of the central render tracker server
+            tracker_url: URL of the central render tracker server, or "unix:///path/to.sock" for a
+                tracker on the same host served with `uvicorn --uds` (needs requests-unixsocket)
+            prefetch: Jobs to claim per request; with more than 1, get_next_job hands them out
+                from a local buffer (claimed jobs show as working until processed)
+            background_updates: If True, mark_job_* calls return immediately and a background
+                thread sends the updates in batches (call flush() or close() before exiting)
+            warmup: If True, open a tracker connection in the background right away so a
+                long-running worker's first status update doesn't pay DNS + TCP/TLS setup
         """
-        self.tracker_url = tracker_url.rstrip('/')
+        socket_path = unix_socket_path(tracker_url)
+        if socket_path:
+            if requests_unixsocket is None:
+                raise ImportError("unix:// tracker URLs require requests-unixsocket (pip install requests-unixsocket)")
+            # requests-unixsocket addresses the socket as a percent-encoded host
+            self.tracker_url = "http+unix://" + quote(socket_path, safe="")
+            adapter_class = requests_unixsocket.UnixAdapter
+        else:
+            self.tracker_url = tracker_url.rstrip('/')
+            adapter_class = HTTPAdapter
+        self.prefetch = prefetch
+        self._next_url = f"{self.tracker_url}/next-job"
+        self._next_jobs_url = f"{self.tracker_url}/next-jobs"
+        self._bulk_status_url = f"{self.tracker_url}/jobs/status"
+        # URL template and pre-encoded request bodies, so a status update does no per-call formatting
+        self._status_url = self.tracker_url + "/job/{}/status"
+        self._status_bodies = {status: json_dumps({"status": status}) for status in JOB_STATUSES}
+        self._buffer = deque()
+        
+        # One keep-alive session for every call instead of a new TCP/TLS connection per request.
+        # Status updates are idempotent, so they are retried on gateway errors too. Claims
+        # (/next-job, /next-jobs) are not: they get their own adapter (requests picks the longest
+        # mounted prefix) that only retries when the request never reached the server.
+        self._session = requests.Session()
+        self._session.headers['Connection'] = 'keep-alive'
+        self._session.mount(self.tracker_url, adapter_class(
+            pool_connections=1, pool_maxsize=4, max_retries=_retry(("GET", "POST"))
+        ))
+        self._session.mount(self._next_url, adapter_class(
+            pool_connections=1, pool_maxsize=4, max_retries=_retry(("GET",))
+        ))
+        
+        # job_id -> (status last sent successfully, monotonic time sent), so repeating the same
+        # transition shortly afterwards costs no request
+        self._status_cache = OrderedDict()
+        self._status_cache_lock = threading.Lock()
+        
+        self._updates = None
+        if background_updates:
+            self._updates = queue.Queue()
+            threading.Thread(target=self._drain_updates, daemon=True).start()
+        
+        if warmup:
+            threading.Thread(target=self._warmup, daemon=True).start()
+    
+    def _warmup(self):
+        """Background thread: establish a pooled connection before first use"""
+        try:
+            self._session.get(f"{self.tracker_url}/health", timeout=5)
+        except requests.RequestException as e:
+            log.warning("Tracker warmup request failed: %s", e)
+    
+    def _drain_updates(self):
+        """Background thread: send queued status updates in batches via the bulk endpoint"""
+        while True:
+            batch = [self._updates.get()]
+            deadline = time.monotonic() + UPDATE_BATCH_WINDOW
+            while len(batch) < UPDATE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._updates.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.update_job_statuses(batch)
+            except Exception as e:
+                # Keep the drain thread alive whatever happens to one batch
+                log.error("Error sending %d queued job statuses: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._updates.task_done()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued background status update has been sent
         
-    def get_next_job(self) -> Optional[int]:
+        Returns:
+            bool: True if the queue drained, False if the timeout expired first
+        """
+        if self._updates is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._updates.all_tasks_done:
+            while self._updates.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._updates.all_tasks_done.wait(remaining)
+        return True
+    
+    def close(self):
+        """Send any pending background updates, then close the underlying HTTP session"""
+        self.flush()
+        self._session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        
+    def get_next_job(self, wait: float = 0) -> Optional[int]:
         """
         Get the next available job from the queue
         
+        Args:
+            wait: Seconds the server may hold the request open until a job appears (long polling),
+                instead of answering "no jobs" straight away
+        
         Returns:
             int: Job ID if available, None if no jobs available
         """
+        if self.prefetch > 1:
+            if not self._buffer:
+                self._buffer.extend(self.get_next_jobs(self.prefetch, wait=wait))
+            return self._buffer.popleft() if self._buffer else None
+        
         try:
-            response = requests.get(f"{self.tracker_url}/next-job", timeout=30)
+            response = self._session.post(
+                self._next_url,
+                params={"wait": wait} if wait else None,
+                timeout=30 + wait
+            )
+            if response.status_code == 404:
+                # Queue is empty (or stayed empty for the whole wait)
+                return None
             response.raise_for_status()
-            data = response.json()
-            return data.get('job_id')
-        except Exception as e:
-            print(f"Error getting next job: {e}")
+            data = json_loads(response.content)
+            job_id = data.get('id')
+            if job_id is not None:
+                # The server just set it to working, which supersedes any status cached from an earlier run
+                self._remember_sent([(job_id, "working")])
+            return job_id
+        except (requests.RequestException, ValueError) as e:
+            log.warning("Error getting next job: %s", e)
             return None
     
+    def get_next_jobs(self, count: int = 16, wait: float = 0) -> List[int]:
+        """
+        Claim up to `count` jobs from the queue in one request
+        
+        Args:
+            count: Maximum number of jobs to claim
+            wait: Seconds the server may hold the request open until a job appears (long polling)
+        
+        Returns:
+            list: Claimed job IDs (empty if no jobs available)
+        """
+        try:
+            params = {"count": count, "wait": wait} if wait else {"count": count}
+            response = self._session.post(self._next_jobs_url, params=params, timeout=30 + wait)
+            response.raise_for_status()
+            job_ids = json_loads(response.content).get('job_ids', [])
+            self._remember_sent([(job_id, "working") for job_id in job_ids])
+            return job_ids
+        except (requests.RequestException, ValueError) as e:
+            log.warning("Error getting next jobs: %s", e)
+            return []
+    
+    def _already_sent(self, job_id: int, status: str) -> bool:
+        with self._status_cache_lock:
+            cached = self._status_cache.get(job_id)
+        return (cached is not None and cached[0] == status
+                and time.monotonic() - cached[1] < STATUS_CACHE_TTL)
+    
+    def _remember_sent(self, updates: Iterable[Tuple[int, str]]):
+        now = time.monotonic()
+        with self._status_cache_lock:
+            for job_id, status in updates:
+                self._status_cache[job_id] = (status, now)
+                self._status_cache.move_to_end(job_id)
+            while len(self._status_cache) > STATUS_CACHE_SIZE:
+                self._status_cache.popitem(last=False)
+    
+    def invalidate(self, job_id: Optional[int] = None):
+        """
+        Forget the cached status of a job (or of every job), e.g. after it was reset on the server,
+        so the next update for it is sent even if it repeats the last status
+        """
+        with self._status_cache_lock:
+            if job_id is None:
+                self._status_cache.clear()
+            else:
+                self._status_cache.pop(job_id, None)
+    
+    def update_job_statuses(self, updates: List[Tuple[int, str]]) -> bool:
+        """
+        Update the status of many jobs in one request
+        
+        Args:
+            updates: (job_id, status) pairs
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        updates = [update for update in updates if not self._already_sent(*update)]
+        if not updates:
+            return True
+        try:
+            body, headers = encode_json_body(
+                {"updates": [{"job_id": job_id, "status": status} for job_id, status in updates]}
+            )
+            response = self._session.post(self._bulk_status_url, data=body, headers=headers, timeout=30)
+            if response.status_code == 404:
+                # Older tracker without the batch route: fall back to one call per job
+                return all([self.update_job_status(job_id, status) for job_id, status in updates])
+            response.raise_for_status()
+            self._remember_sent(updates)
+            return True
+        except (requests.RequestException, ValueError) as e:
+            log.warning("Error updating %d job statuses: %s", len(updates), e)
+            return False
+    
     def update_job_status(self, job_id: int, status: str) -> bool:
         """
         Update the status of a job
@@ -45,35 +358,218 @@ class RenderQueueClient:
         Returns:
             bool: True if successful, False otherwise
         """
+        if self._already_sent(job_id, status):
+            return True
         try:
-            response = requests.post(
-                f"{self.tracker_url}/job/{job_id}/status",
-                json={"status": status},
+            body = self._status_bodies.get(status) or json_dumps({"status": status})
+            response = self._session.post(
+                self._status_url.format(job_id),
+                data=body,
+                headers=JSON_HEADERS,
                 timeout=30
             )
             response.raise_for_status()
+            self._remember_sent([(job_id, status)])
             return True
-        except Exception as e:
-            print(f"Error updating job {job_id} status to {status}: {e}")
+        except (requests.RequestException, ValueError) as e:
+            log.warning("Error updating job %s status to %s: %s", job_id, status, e)
             return False
     
+    def mark_files_complete(self, filenames: Iterable[str]) -> bool:
+        """
+        Mark the jobs for a set of uploaded files (e.g. "123.png") as complete in one request
+        
+        Returns:
+            bool: True if successful (or there was nothing to mark), False otherwise
+        """
+        job_ids = extract_job_ids(filenames)
+        if not job_ids:
+            return True
+        return self.update_job_statuses([(job_id, "complete") for job_id in job_ids])
+    
+    def _mark(self, job_id: int, status: str) -> bool:
+        if self._updates is not None:
+            # Queued for the background thread; the caller carries on immediately
+            self._updates.put((job_id, status))
+            return True
+        return self.update_job_status(job_id, status)
+    
     def mark_job_complete(self, job_id: int) -> bool:
         """Mark a job as complete"""
-        return self.update_job_status(job_id, "complete")
+        return self._mark(job_id, "complete")
     
     def mark_job_error(self, job_id: int) -> bool:
         """Mark a job as error"""
-        return self.update_job_status(job_id, "error")
+        return self._mark(job_id, "error")
     
     def mark_job_done(self, job_id: int) -> bool:
         """Mark a job as done (downloaded)"""
-        return self.update_job_status(job_id, "done")
+        return self._mark(job_id, "done")
+
+
+def install_uvloop() -> bool:
+    """
+    Make asyncio use uvloop's faster event loop, if uvloop is installed
+    
+    Call once at startup of a dedicated async worker process, before asyncio.run(). It is not done
+    on import because it would swap the event loop policy of whatever process imports this module.
+    
+    Returns:
+        bool: True if uvloop was installed, False if it isn't available
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    return True
+
+
+class AsyncRenderQueueClient:
+    """
+    Asyncio version of RenderQueueClient, for workers that drive many jobs from one event loop
+    
+    Usage:
+        async with AsyncRenderQueueClient("http://tracker:8000") as client:
+            job_id = await client.get_next_job()
+            ...
+            await client.mark_job_complete(job_id)
+    """
+    def __init__(self, tracker_url: str = "http://localhost:8000", http2: bool = False):
+        """
+        Initialize the async render queue client
+        
+        Args:
+            tracker_url: URL of the central render tracker server, or "unix:///path/to.sock" for a
+                tracker on the same host served with `uvicorn --uds`
+            http2: Negotiate HTTP/2 so concurrent requests share one multiplexed connection
+                (needs `pip install httpx[http2]`; falls back to HTTP/1.1 if the server doesn't offer it)
+        """
+        if httpx is None:
+            raise ImportError("AsyncRenderQueueClient requires httpx (pip install httpx)")
+        # A co-located tracker can be reached over a Unix domain socket, skipping the TCP stack;
+        # the host in base_url is then only used for the Host header
+        socket_path = unix_socket_path(tracker_url)
+        self.tracker_url = "http://tracker" if socket_path else tracker_url.rstrip('/')
+        # The transport retries failed connection attempts (the request never reached the server)
+        self._client = httpx.AsyncClient(
+            base_url=self.tracker_url,
+            timeout=30,
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                http2=http2,
+                uds=socket_path,
+                limits=httpx.Limits(max_keepalive_connections=8)
+            )
+        )
+    
+    async def close(self):
+        """Close the underlying HTTP client"""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+    
+    async def get_next_job(self, wait: float = 0) -> Optional[int]:
+        """
+        Get the next available job from the queue
+        
+        Args:
+            wait: Seconds the server may hold the request open until a job appears (long polling)
+        
+        Returns:
+            int: Job ID if available, None if no jobs available
+        """
+        try:
+            response = await self._client.post(
+                "/next-job",
+                params={"wait": wait} if wait else None,
+                timeout=30 + wait
+            )
+            if response.status_code == 404:
+                # Queue is empty (or stayed empty for the whole wait)
+                return None
+            response.raise_for_status()
+            data = json_loads(response.content)
+            return data.get('id')
+        except (httpx.HTTPError, ValueError) as e:
+            log.warning("Error getting next job: %s", e)
+            return None
+    
+    async def update_job_statuses(self, updates: List[Tuple[int, str]]) -> bool:
+        """
+        Update the status of many jobs in one request
+        
+        Args:
+            updates: (job_id, status) pairs
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            body, headers = encode_json_body(
+                {"updates": [{"job_id": job_id, "status": status} for job_id, status in updates]}
+            )
+            response = await self._client.post("/jobs/status", content=body, headers=headers)
+            if response.status_code == 404:
+                # Older tracker without the batch route: send the updates concurrently instead
+                # (multiplexed over one connection when http2 is enabled)
+                results = await asyncio.gather(
+                    *(self.update_job_status(job_id, status) for job_id, status in updates)
+                )
+                return all(results)
+            response.raise_for_status()
+            return True
+        except (httpx.HTTPError, ValueError) as e:
+            log.warning("Error updating %d job statuses: %s", len(updates), e)
+            return False
+    
+    async def update_job_status(self, job_id: int, status: str) -> bool:
+        """
+        Update the status of a job
+        
+        Args:
+            job_id: The job ID to update
+            status: New status (inactive, working, complete, done, error, flagged)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            response = await self._client.post(
+                f"/job/{job_id}/status",
+                content=json_dumps({"status": status}),
+                headers=JSON_HEADERS
+            )
+            response.raise_for_status()
+            return True
+        except (httpx.HTTPError, ValueError) as e:
+            log.warning("Error updating job %s status to %s: %s", job_id, status, e)
+            return False
+    
+    async def mark_job_complete(self, job_id: int) -> bool:
+        """Mark a job as complete"""
+        return await self.update_job_status(job_id, "complete")
+    
+    async def mark_job_error(self, job_id: int) -> bool:
+        """Mark a job as error"""
+        return await self.update_job_status(job_id, "error")
+    
+    async def mark_job_done(self, job_id: int) -> bool:
+        """Mark a job as done (downloaded)"""
+        return await self.update_job_status(job_id, "done")
 
 
 # Example usage for ComfyUI custom node
 def example_comfyui_integration():
     """
     Example of how to integrate this with a ComfyUI custom node
+    
+    Async workers use AsyncRenderQueueClient the same way; call install_uvloop()
+    before asyncio.run(main()) to run them on uvloop.
     """
     # Initialize client (adjust URL for your setup)
     client = RenderQueueClient("http://YOUR_TRACKER_SERVER:8000")
@@ -104,7 +600,8 @@ def example_upload_integration(filename: str, tracker_url: str):
     """
     # Extract job ID from filename
     try:
-        job_id = int(os.path.splitext(filename)[0])
+        stem, sep, _ = filename.rpartition('.')
+        job_id = int(stem) if sep else int(filename)
         
         # Mark job as complete
         client = RenderQueueClient(tracker_url)
@@ -120,6 +617,8 @@ def example_upload_integration(filename: str, tracker_url: str):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
     # Test the client
     client = RenderQueueClient()
     